@@ -1,19 +1,47 @@
 import os
 import requests
 import re
-import string
 import time
 import random
-from flask import Flask, request, jsonify, send_from_directory
+import shutil
+import uuid
+import json
+import hashlib
+import mimetypes
+import threading
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from flask import Flask, request, send_from_directory, Response
 from flask_cors import CORS
+from werkzeug.utils import safe_join
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    # Lexbor-backed HTML parser: much faster than regexing whole pages
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    # Rust JSON encoder, ~5x faster than stdlib and emits bytes directly
+    import orjson
+except ImportError:
+    orjson = None
+
+def json_bytes(obj):
+    return orjson.dumps(obj) if orjson is not None else json.dumps(obj).encode()
+
+def ojsonify(obj):
+    return Response(json_bytes(obj), mimetype='application/json')
 
 app = Flask(__name__)
 CORS(app)
 
 # --- CONFIGURATION ---
 LIBRARY_PATH = "/app/library"
-if not os.path.exists(LIBRARY_PATH):
-    os.makedirs(LIBRARY_PATH)
+os.makedirs(LIBRARY_PATH, exist_ok=True)
 
 # --- MIRRORS ---
 # We prioritize .li now as .lc might be serving a captcha page
@@ -36,106 +64,388 @@ def get_headers():
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
     }
 
+# --- CONNECTION POOL ---
+# One shared Session: keep-alive to the mirrors instead of a fresh
+# TCP+TLS handshake per request.
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.3),
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+# --- REDIS ---
+# Optional, enabled via MONOLITH_REDIS_URL (e.g. redis://localhost:6379/0).
+# Carries the search cache and — critical with several gunicorn
+# workers — download job state, so any worker can answer a status poll.
+SEARCH_CACHE_TTL = 600
+REDIS = None
+if os.environ.get("MONOLITH_REDIS_URL"):
+    try:
+        import redis
+        REDIS = redis.Redis.from_url(os.environ["MONOLITH_REDIS_URL"])
+        REDIS.ping()
+        print("Monolith: Redis online (search cache + job state).")
+    except Exception as e:
+        print(f"Monolith: Redis unavailable ({e}). Running process-local.")
+        REDIS = None
+
+# Without Redis, fall back to a small in-process TTL dict so repeat
+# queries still skip the mirrors (per worker, good enough for one box).
+_LOCAL_CACHE = {}
+_LOCAL_CACHE_LOCK = threading.Lock()
+_LOCAL_CACHE_MAX = 512
+
+def _search_cache_key(q):
+    return "mono:q:" + hashlib.blake2b(q.lower().encode(), digest_size=16).hexdigest()
+
+def cache_get_search(q):
+    key = _search_cache_key(q)
+    if REDIS is not None:
+        try:
+            v = REDIS.get(key)
+            return json.loads(v) if v else None
+        except Exception:
+            return None
+    with _LOCAL_CACHE_LOCK:
+        hit = _LOCAL_CACHE.get(key)
+        if hit is None:
+            return None
+        if hit[0] < time.time():
+            del _LOCAL_CACHE[key]
+            return None
+        return hit[1]
+
+def cache_set_search(q, results):
+    if not results: return
+    key = _search_cache_key(q)
+    if REDIS is not None:
+        try:
+            REDIS.setex(key, SEARCH_CACHE_TTL, json.dumps(results))
+        except Exception:
+            pass
+        return
+    with _LOCAL_CACHE_LOCK:
+        if len(_LOCAL_CACHE) >= _LOCAL_CACHE_MAX:
+            # Dicts iterate in insertion order: drop the oldest entry
+            del _LOCAL_CACHE[next(iter(_LOCAL_CACHE))]
+        _LOCAL_CACHE[key] = (time.time() + SEARCH_CACHE_TTL, results)
+
+# --- PATTERNS ---
+# Compiled once at import; these run on every search/download.
+_STRIP_TABLE = str.maketrans('', '', '\\/*?:"<>|')
+_WS_RE = re.compile(r'\s+')
+# Regex for MD5 (Captures standard and .li formats)
+# We look for ANY 32-char hex string preceded by 'md5='
+_MD5_RE = re.compile(r'md5=([A-Fa-f0-9]{32})')
+_LINK_RE = re.compile(r'<a href="(.*?)"')
+
+# We only ever surface this many artifacts per search
+MAX_ARTIFACTS = 15
+META_FIELDS = "id,title,author,year,extension,md5,filesize"
+
+def extract_md5s(html, limit=MAX_ARTIFACTS):
+    # Pull MD5s out of a search results page, deduping incrementally
+    # and stopping at `limit` — no point scanning the rest of the page
+    # once we have all we'll show. Prefer the real parser, fall back to
+    # the blindfire regex if selectolax isn't installed.
+    seen = set()
+    if HTMLParser is not None:
+        for a in HTMLParser(html).css('a[href*="md5="]'):
+            m = _MD5_RE.search(a.attributes.get('href') or '')
+            if m:
+                seen.add(m.group(1))
+                if len(seen) >= limit: break
+    else:
+        for m in _MD5_RE.finditer(html):
+            seen.add(m.group(1))
+            if len(seen) >= limit: break
+    return list(seen)
+
+def extract_gateway_link(html):
+    # The library.lol gateway page: the real download link lives in the
+    # #download block (or the h2 GET link).
+    if HTMLParser is not None:
+        node = HTMLParser(html).css_first('#download a, h2 a')
+        if node:
+            href = node.attributes.get('href')
+            if href and href.startswith("http"):
+                return href
+    for m in _LINK_RE.findall(html):
+        if m.startswith("http"):
+            return m
+    return None
+
+@lru_cache(maxsize=2048)
 def clean_text(text):
+    # One translate pass strips unsafe filename chars, one regex pass
+    # collapses whitespace, one .title() pass capitalizes. Pure, so
+    # memoized: authors especially repeat across result pages.
     if not text: return "Unknown"
-    text = " ".join(text.split()) 
-    text = string.capwords(text)
-    safe_text = re.sub(r'[\\/*?:"<>|]', "", text)
-    return safe_text
+    return (_WS_RE.sub(" ", text.translate(_STRIP_TABLE)).strip() or "Unknown").title()
 
 @app.route("/")
 def home():
     return "The Monolith is Online. Blindfire Protocol."
 
+def ping_mirror(m):
+    try:
+        r = SESSION.get(m, headers=get_headers(), timeout=5, verify=False)
+        return m, "success" if r.status_code == 200 else f"status_{r.status_code}"
+    except Exception:
+        return m, "blocked"
+
 @app.route("/api/health")
 def health_check():
-    report = {"status": "online", "mirrors": {}}
-    for m in MIRRORS:
-        try:
-            r = requests.get(m, headers=get_headers(), timeout=5, verify=False)
-            report["mirrors"][m] = "success" if r.status_code == 200 else f"status_{r.status_code}"
-        except Exception as e:
-            report["mirrors"][m] = "blocked"
-    return jsonify(report)
+    # Ping every mirror at once: worst case is one timeout, not four
+    with ThreadPoolExecutor(max_workers=len(MIRRORS)) as ex:
+        report = {"status": "online", "mirrors": dict(ex.map(ping_mirror, MIRRORS))}
+    return ojsonify(report)
+
+# Mirrors occasionally serve enormous pages; everything we want sits in
+# the first stretch, so never read (or decode) more than this much.
+PAGE_READ_CAP = 512 * 1024
+
+def read_capped(r, max_bytes=PAGE_READ_CAP):
+    r.raw.decode_content = True
+    return r.raw.read(max_bytes).decode('utf-8', 'ignore')
+
+def probe_mirror(mirror, q):
+    # One mirror's search page -> list of MD5s (empty if blocked/captcha)
+    print(f"Monolith: Pinging {mirror}...")
+    with SESSION.get(f"{mirror}/search.php",
+                     params={"req": q, "res": 25, "view": "simple", "column": "def"},
+                     headers=get_headers(), timeout=8, verify=False, stream=True) as r:
+        if r.status_code != 200:
+            return []
+        md5s = extract_md5s(read_capped(r))
+    if not md5s:
+        print(f"Monolith: Connected to {mirror} but found 0 MD5s. (Possibly captcha page?)")
+    return md5s
+
+def build_results(md5s):
+    # --- BLINDFIRE METADATA FETCH ---
+    # Try to get data. If it fails, RETURN THE MD5 ANYWAY.
+    # Returns (results, blind): blind=True means the placeholder
+    # fallback was engaged.
+    ids = ",".join(md5s[:MAX_ARTIFACTS])
+
+    try:
+        # Try to use .lc API for metadata because it's usually standard
+        meta_r = SESSION.get("http://libgen.lc/json.php",
+                             params={"ids": ids, "fields": META_FIELDS},
+                             headers=get_headers(), timeout=6, verify=False)
+        if meta_r.status_code != 200:
+            raise Exception("API status not 200")
+        data = meta_r.json()
+
+        # Process clean data: filter first, so rejected extensions
+        # never build a dict at all
+        return [{
+            "title": clean_text(item.get('title')),
+            "author": clean_text(item.get('author')),
+            "year": item.get('year'),
+            "extension": ext,
+            "size": item.get('filesize'),
+            "md5": (md5 := item.get('md5')),
+            "download_url": f"http://library.lol/main/{md5}"
+        } for item in data
+          if (ext := (item.get('extension') or '').lower()) in ('pdf', 'epub')], False
+
+    except Exception as e:
+        print(f"Monolith: Metadata fetch failed ({e}). Engaging Blind Mode.")
+        # FALLBACK: Return raw MD5s so user can still download
+        return [{
+            "title": "Unknown Artifact (Click to Retrieve)",
+            "author": "System",
+            "year": "????",
+            "extension": "pdf",
+            "size": "??",
+            "md5": m,
+            "download_url": f"http://library.lol/main/{m}"
+        } for m in md5s[:MAX_ARTIFACTS]], True
 
 @app.route("/api/search")
 def search():
     q = request.args.get("q", "").strip()
-    if not q: return jsonify({"error": "missing query"}), 400
+    if not q: return ojsonify({"error": "missing query"}), 400
+
+    cached = cache_get_search(q)
+    if cached is not None:
+        print(f"Monolith: Cache hit for '{q}'.")
+        resp = ojsonify(cached)
+        resp.headers['Cache-Control'] = 'public, max-age=300'
+        return resp
 
     print(f"Monolith: Blindfire Scan for '{q}'...")
-    
+
     out = []
-    
-    for mirror in MIRRORS:
-        try:
-            print(f"Monolith: Pinging {mirror}...")
-            # Use basic search parameters
-            search_url = f"{mirror}/search.php?req={q}&res=25&view=simple&column=def"
-            r = requests.get(search_url, headers=get_headers(), timeout=8, verify=False)
-            
-            if r.status_code != 200: continue
-
-            # Regex for MD5 (Captures standard and .li formats)
-            # We look for ANY 32-char hex string preceded by 'md5='
-            md5_pattern = r'md5=([A-Fa-f0-9]{32})'
-            md5s = list(set(re.findall(md5_pattern, r.text)))
-            
+    blind = False
+
+    # Race all mirrors at once instead of eating each dead mirror's
+    # full timeout sequentially. The winner is the first mirror whose
+    # artifacts survive the metadata filter — if everything it found
+    # gets filtered out (no pdf/epub), keep consuming the remaining
+    # probes, like the old sequential loop fell through to the next
+    # mirror.
+    executor = ThreadPoolExecutor(max_workers=len(MIRRORS))
+    try:
+        futures = {executor.submit(probe_mirror, m, q): m for m in MIRRORS}
+        for future in as_completed(futures):
+            mirror = futures[future]
+            try:
+                md5s = future.result()
+            except Exception as e:
+                print(f"Monolith: {mirror} failed: {e}")
+                continue
             if not md5s:
-                print(f"Monolith: Connected to {mirror} but found 0 MD5s. (Possibly captcha page?)")
                 continue
-            
             print(f"Monolith: Lock on via {mirror}. Found {len(md5s)} artifacts.")
-            
-            # --- BLINDFIRE METADATA FETCH ---
-            # Try to get data. If it fails, RETURN THE MD5 ANYWAY.
-            
-            ids = ",".join(md5s[:15])
-            
-            # Try to use .lc API for metadata because it's usually standard
-            meta_url = f"http://libgen.lc/json.php?ids={ids}&fields=id,title,author,year,extension,md5,filesize"
-            
-            try:
-                meta_r = requests.get(meta_url, headers=get_headers(), timeout=6, verify=False)
-                if meta_r.status_code == 200:
-                    data = meta_r.json()
-                    
-                    # Process clean data
-                    for item in data:
-                        ext = item.get('extension', '').lower()
-                        if ext not in ['pdf', 'epub']: continue
-                        md5 = item.get('md5')
-                        out.append({
-                            "title": clean_text(item.get('title')),
-                            "author": clean_text(item.get('author')),
-                            "year": item.get('year'),
-                            "extension": ext,
-                            "size": item.get('filesize'),
-                            "download_url": f"http://library.lol/main/{md5}"
-                        })
+            out, blind = build_results(md5s)
+            if out:
+                break
+            print(f"Monolith: {mirror} artifacts all filtered out. Trying next mirror.")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Blind-mode placeholders are a degraded answer to a transient
+    # metadata failure — serve them, but never cache them
+    resp = ojsonify(out)
+    if out and not blind:
+        cache_set_search(q, out)
+        # Let the browser reuse its copy too
+        resp.headers['Cache-Control'] = 'public, max-age=300'
+    return resp
+
+# --- OBJECT STORE ---
+# Content-addressed copies under library/.objects/<md5[:2]>/<md5>; the
+# user-visible file is a hardlink, so re-acquiring a book we already
+# hold is a link() syscall instead of a 100 MB transfer. The dot-dir is
+# invisible to the library walk.
+OBJECTS_PATH = os.path.join(LIBRARY_PATH, ".objects")
+_HEX32_RE = re.compile(r'[a-f0-9]{32}')
+
+def object_path(md5):
+    return os.path.join(OBJECTS_PATH, md5[:2], md5)
+
+def link_object(obj_path, filepath):
+    try:
+        os.link(obj_path, filepath)
+    except FileExistsError:
+        pass
+
+# --- ACQUISITION QUEUE ---
+# Downloads take minutes; don't hold an HTTP worker hostage for them.
+# POST /api/download queues the job and returns immediately, the
+# frontend polls /api/download/status/<id>.
+_DOWNLOAD_POOL = ThreadPoolExecutor(max_workers=4)
+# Settled jobs stay queryable for this long
+JOB_TTL = 3600
+_JOBS = {}
+_JOBS_LOCK = threading.Lock()
+# In-flight guard: filepath -> job_id, so two clicks on the same book
+# share one transfer instead of racing to write the same file. The
+# lock makes check-and-claim atomic under threaded workers; the guard
+# itself is per process (with several workers the .part/rename flow
+# still keeps a double transfer harmless, just wasteful).
+_ACTIVE = {}
+_ACTIVE_LOCK = threading.Lock()
+
+def job_set(job_id, record):
+    # Status polls can land on any gunicorn worker, so job state goes
+    # through Redis whenever it's configured; the in-process dict is
+    # the fallback, and gunicorn.conf.py keeps to a single worker in
+    # that case so the dict is authoritative.
+    if REDIS is not None:
+        try:
+            REDIS.setex("mono:job:" + job_id, JOB_TTL, json.dumps(record))
+            return
+        except Exception:
+            pass
+    now = time.time()
+    with _JOBS_LOCK:
+        # Redis entries expire on their own; mirror that here by
+        # pruning jobs that settled more than JOB_TTL ago
+        stale = [jid for jid, (ts, rec) in _JOBS.items()
+                 if rec["state"] in ("SUCCESS", "FAILURE") and now - ts > JOB_TTL]
+        for jid in stale:
+            del _JOBS[jid]
+        _JOBS[job_id] = (now, record)
+
+def job_get(job_id):
+    if REDIS is not None:
+        try:
+            v = REDIS.get("mono:job:" + job_id)
+            if v is not None:
+                return json.loads(v)
+        except Exception:
+            pass
+    with _JOBS_LOCK:
+        hit = _JOBS.get(job_id)
+        return hit[1] if hit else None
+
+def fetch_book(job_id, raw_url, filepath, filename, md5=""):
+    job_set(job_id, {"state": "RUNNING", "filename": filename})
+    try:
+        # Resolve Gateway
+        with SESSION.get(raw_url, headers=get_headers(), timeout=15, verify=False, stream=True) as r_gateway:
+            real_dl_url = extract_gateway_link(read_capped(r_gateway)) or raw_url
+
+        print(f"Monolith: Downloading from {real_dl_url}...")
+        r_file = SESSION.get(real_dl_url, headers=get_headers(), stream=True, timeout=300, verify=False)
+        r_file.raise_for_status()
+        r_file.raw.decode_content = True
+
+        # Stream into a .part file and rename into place on success, so
+        # an aborted transfer never leaves a corrupt "already exists"
+        # artifact in the library. With a known MD5 the stream lands in
+        # the object store (hash-verified) and the library path becomes
+        # a hardlink to it.
+        if md5:
+            final_path = object_path(md5)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        else:
+            final_path = filepath
+        tmp_path = final_path + ".part"
+        try:
+            hasher = hashlib.md5() if md5 else None
+            with open(tmp_path, 'wb', buffering=2 * 1024 * 1024) as f:
+                if hasher is None:
+                    # copyfileobj pumps socket -> file in a tight C
+                    # loop; big chunks + a big file buffer = way fewer
+                    # write() syscalls
+                    shutil.copyfileobj(r_file.raw, f, length=1024 * 1024)
                 else:
-                    raise Exception("API status not 200")
+                    while chunk := r_file.raw.read(1024 * 1024):
+                        hasher.update(chunk)
+                        f.write(chunk)
+            if hasher is not None and hasher.hexdigest() != md5:
+                raise Exception(f"MD5 mismatch (expected {md5}, got {hasher.hexdigest()})")
+            os.replace(tmp_path, final_path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
 
-            except Exception as e:
-                print(f"Monolith: Metadata fetch failed ({e}). Engaging Blind Mode.")
-                # FALLBACK: Return raw MD5s so user can still download
-                for m in md5s[:15]:
-                    out.append({
-                        "title": "Unknown Artifact (Click to Retrieve)",
-                        "author": "System",
-                        "year": "????",
-                        "extension": "pdf",
-                        "size": "??",
-                        "download_url": f"http://library.lol/main/{m}"
-                    })
-
-            if out: return jsonify(out)
-                
-        except Exception as e:
-            print(f"Monolith: {mirror} failed: {e}")
-            continue
-            
-    return jsonify([])
+        if md5:
+            link_object(final_path, filepath)
+
+        invalidate_library_cache()
+        job_set(job_id, {"state": "SUCCESS", "filename": filename})
+
+    except Exception as e:
+        print(f"Monolith: Acquisition failed: {e}")
+        job_set(job_id, {"state": "FAILURE", "filename": filename, "error": str(e)})
+
+    finally:
+        # Release the in-flight claim so the path can be re-requested
+        with _ACTIVE_LOCK:
+            if _ACTIVE.get(filepath) == job_id:
+                del _ACTIVE[filepath]
 
 @app.route("/api/download", methods=["POST"])
 def download_book():
@@ -145,68 +455,142 @@ def download_book():
     title = clean_text(data.get("title", "Unknown Title"))
     year = data.get("year", "")
     ext = data.get("extension", "pdf")
+    md5 = (data.get("md5") or "").strip().lower()
+    if not _HEX32_RE.fullmatch(md5): md5 = ""
 
-    if not raw_url: return jsonify({"error": "No URL provided"}), 400
+    if not raw_url: return ojsonify({"error": "No URL provided"}), 400
 
     author_dir = os.path.join(LIBRARY_PATH, author)
-    if not os.path.exists(author_dir):
-        os.makedirs(author_dir)
+    os.makedirs(author_dir, exist_ok=True)
 
     filename = f"{title} ({year}).{ext}"
     filepath = os.path.join(author_dir, filename)
 
     if os.path.exists(filepath):
-        return jsonify({"message": "Artifact already exists", "filename": filename})
+        return ojsonify({"message": "Artifact already exists", "filename": filename})
 
-    try:
-        # Resolve Gateway
-        r_gateway = requests.get(raw_url, headers=get_headers(), timeout=15, verify=False)
-        link_pattern = r'<a href="(.*?)"'
-        matches = re.findall(link_pattern, r_gateway.text)
-        
-        real_dl_url = raw_url
-        for m in matches:
-            if m.startswith("http"): 
-                real_dl_url = m
-                break
+    # Already in the object store? Link it in, skip the network entirely.
+    if md5 and os.path.exists(object_path(md5)):
+        link_object(object_path(md5), filepath)
+        invalidate_library_cache()
+        return ojsonify({"message": "Artifact linked from object store", "filename": filename})
 
-        print(f"Monolith: Downloading from {real_dl_url}...")
-        r_file = requests.get(real_dl_url, headers=get_headers(), stream=True, timeout=300, verify=False)
-        r_file.raise_for_status()
-        
-        with open(filepath, 'wb') as f:
-            for chunk in r_file.iter_content(chunk_size=8192):
-                f.write(chunk)
-                
-        return jsonify({"success": True, "filename": filename})
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    job_id = uuid.uuid4().hex
+    with _ACTIVE_LOCK:
+        active_id = _ACTIVE.get(filepath)
+        if active_id:
+            active_job = job_get(active_id)
+            if active_job and active_job.get("state") in ("PENDING", "RUNNING"):
+                return ojsonify({"job_id": active_id, "state": active_job["state"], "filename": filename}), 202
+        # Claim and record the job before releasing the lock, so the
+        # next claimant sees a PENDING job rather than an unknown id
+        _ACTIVE[filepath] = job_id
+        job_set(job_id, {"state": "PENDING", "filename": filename})
+
+    _DOWNLOAD_POOL.submit(fetch_book, job_id, raw_url, filepath, filename, md5)
+    return ojsonify({"job_id": job_id, "state": "PENDING", "filename": filename}), 202
+
+@app.route("/api/download/status/<job_id>")
+def download_status(job_id):
+    job = job_get(job_id)
+    if job is None:
+        return ojsonify({"error": "unknown job"}), 404
+    return ojsonify(job)
+
+# --- LIBRARY CACHE ---
+# The full walk + sort + serialize only reruns when the tree actually
+# changed. Keyed on the root mtime plus every author dir's mtime, so
+# files landing inside an existing author dir bust the cache even when
+# they arrive outside fetch_book (which still invalidates explicitly).
+_LIB_CACHE = {"key": None, "body": b""}
+
+def library_cache_key():
+    key = [os.stat(LIBRARY_PATH).st_mtime_ns]
+    with os.scandir(LIBRARY_PATH) as it:
+        for e in it:
+            if e.is_dir() and not e.name.startswith('.'):
+                key.append(e.stat().st_mtime_ns)
+    return tuple(key)
+
+def invalidate_library_cache():
+    _LIB_CACHE["key"] = None
 
 @app.route("/api/library")
 def get_library():
+    key = library_cache_key()
+    if key == _LIB_CACHE["key"]:
+        return Response(_LIB_CACHE["body"], mimetype='application/json')
+
     files = []
-    for root, dirs, filenames in os.walk(LIBRARY_PATH):
-        for f in filenames:
-            if f.startswith('.'): continue
-            full_path = os.path.join(root, f)
-            relative_path = os.path.relpath(full_path, LIBRARY_PATH).replace("\\", "/")
-            author_name = os.path.basename(root)
-            if root == LIBRARY_PATH: author_name = "Unsorted"
-            name_parts = os.path.splitext(f)[0]
-            ext = os.path.splitext(f)[1].replace(".", "")
-            files.append({
-                "filename": relative_path,
-                "title": name_parts,
-                "author": author_name,
-                "extension": ext
-            })
+    # scandir walk: DirEntry caches name/path/type from readdir, so no
+    # extra stat per file, and tracking the relative prefix ourselves
+    # avoids an os.path.relpath call per entry.
+    stack = [("", LIBRARY_PATH)]
+    while stack:
+        rel_prefix, dirpath = stack.pop()
+        author_name = os.path.basename(dirpath) if rel_prefix else "Unsorted"
+        try:
+            entries = os.scandir(dirpath)
+        except OSError:
+            continue
+        with entries:
+            for e in entries:
+                name = e.name
+                if name[0] == '.': continue
+                if e.is_dir(follow_symlinks=False):
+                    stack.append((f"{rel_prefix}{name}/", e.path))
+                    continue
+                if not e.is_file(follow_symlinks=False):
+                    continue
+                title, dot, ext = name.rpartition('.')
+                if not dot:
+                    title, ext = name, ""
+                files.append({
+                    "filename": rel_prefix + name,
+                    "title": title,
+                    "author": author_name,
+                    "extension": ext
+                })
     files.sort(key=lambda x: (x['author'], x['title']))
-    return jsonify(files)
+
+    def generate():
+        # Stream the array entry by entry so the client gets bytes
+        # before the whole blob is serialized, accumulating the pieces
+        # to install in the cache once the stream completes.
+        parts = [b'[']
+        yield b'['
+        for i, entry in enumerate(files):
+            piece = (b',' if i else b'') + json_bytes(entry)
+            parts.append(piece)
+            yield piece
+        parts.append(b']')
+        yield b']'
+        _LIB_CACHE["body"] = b''.join(parts)
+        _LIB_CACHE["key"] = key
+
+    return Response(generate(), mimetype='application/json')
+
+# --- FILE SERVING ---
+# Behind nginx, map an `internal;` location onto LIBRARY_PATH and set
+# MONOLITH_ACCEL_PREFIX (e.g. /internal-library): the response then
+# hands off via X-Accel-Redirect and the kernel's sendfile moves the
+# bytes, keeping Python out of the data path entirely.
+# MONOLITH_X_SENDFILE=1 does the same for Apache/uWSGI-style fronts.
+ACCEL_PREFIX = os.environ.get("MONOLITH_ACCEL_PREFIX", "").rstrip("/")
+app.use_x_sendfile = os.environ.get("MONOLITH_X_SENDFILE") == "1"
 
 @app.route("/files/<path:filename>")
 def serve_book(filename):
+    if ACCEL_PREFIX:
+        full_path = safe_join(LIBRARY_PATH, filename)
+        if full_path is None or not os.path.isfile(full_path):
+            return ojsonify({"error": "not found"}), 404
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        resp = Response(mimetype=mimetype)
+        resp.headers['X-Accel-Redirect'] = quote(f"{ACCEL_PREFIX}/{filename}")
+        return resp
     return send_from_directory(LIBRARY_PATH, filename)
 
 if __name__ == "__main__":
+    # Local dev only — production runs `gunicorn -c gunicorn.conf.py app:app`
     app.run(host="0.0.0.0", port=9696, debug=True)
@@ -0,0 +1,42 @@
+# Production server config. The app is almost entirely I/O-bound
+# (waiting on mirrors and library.lol), so gevent workers turn every
+# blocking socket call into a cooperative yield; the gevent worker
+# class monkey-patches the stdlib itself before loading the app.
+# MONOLITH_WORKER_CLASS=gthread gives a plain-threads deployment where
+# gevent is unwanted.
+import multiprocessing
+import os
+
+bind = "0.0.0.0:9696"
+worker_class = os.environ.get("MONOLITH_WORKER_CLASS", "gevent")
+
+def _redis_usable():
+    # app.py fails open to process-local job state when Redis can't be
+    # reached, regardless of MONOLITH_REDIS_URL being set. Mirror that
+    # check here so we never scale past one worker on the strength of
+    # an env var the app itself ended up ignoring.
+    url = os.environ.get("MONOLITH_REDIS_URL")
+    if not url:
+        return False
+    try:
+        import redis
+        redis.Redis.from_url(url).ping()
+        return True
+    except Exception as e:
+        print(f"Monolith: Redis unavailable at boot ({e}). Staying single-worker.")
+        return False
+
+# Download job state is shared through Redis when it's reachable;
+# otherwise the state lives in one process's memory, so stay at a
+# single worker or status polls land on workers that never saw the job.
+if os.environ.get("MONOLITH_WORKERS"):
+    workers = int(os.environ["MONOLITH_WORKERS"])
+elif _redis_usable():
+    workers = 2 * multiprocessing.cpu_count() + 1
+else:
+    workers = 1
+worker_connections = 1000
+threads = 8  # only used by gthread
+# Downloads can legitimately run for minutes
+timeout = 600
+keepalive = 75